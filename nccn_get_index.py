@@ -11,10 +11,18 @@ import httpx
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import logging
+from logging.handlers import RotatingFileHandler
 import yaml
 import os
 from datetime import datetime
 
+# Prefer the libyaml C binding when PyYAML was built with it; the pure-Python
+# parser is significantly slower on multi-KB documents.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # Ensure logs directory exists
 LOGS_DIR = os.path.join(os.path.dirname(__file__), 'logs')
 os.makedirs(LOGS_DIR, exist_ok=True)
@@ -35,8 +43,8 @@ if not logger.handlers:
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
     
-    # Add file handler
-    file_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'nccn_get_index.log'))
+    # Add size-bounded file handler; the file is only opened on the first record
+    file_handler = RotatingFileHandler(os.path.join(LOGS_DIR, 'nccn_get_index.log'), maxBytes=5 * 1024 * 1024, backupCount=3, delay=True)
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -47,6 +55,7 @@ if not logger.handlers:
 # Constants
 DEFAULT_OUTPUT_FILE = 'nccn_guidelines_index.yaml'
 CACHE_MAX_AGE_DAYS = 7  # Default maximum cache file validity period (days)
+MAX_CONCURRENT_FETCHES = 8  # Upper bound on simultaneous page fetches to avoid hammering NCCN
 
 
 async def fetch_page(client: httpx.AsyncClient, url: str, max_retries: int = 3) -> str:
@@ -168,18 +177,20 @@ async def find_nccn_guideline_link(client: httpx.AsyncClient, url: str) -> str:
     return ""
 
 
-async def process_single_item(client: httpx.AsyncClient, item: dict) -> dict:
+async def process_single_item(client: httpx.AsyncClient, item: dict, semaphore: asyncio.Semaphore) -> dict:
     """
     Process single item, find its NCCN guidelines link
-    
+
     Args:
         client: httpx async client
         item: Dictionary containing title and url
-    
+        semaphore: Semaphore bounding concurrent page fetches
+
     Returns:
         Enhanced item dictionary containing guideline_link
     """
-    guideline_link = await find_nccn_guideline_link(client, item['url'])
+    async with semaphore:
+        guideline_link = await find_nccn_guideline_link(client, item['url'])
     return {
         'title': item['title'],
         'url': item['url'],
@@ -187,14 +198,15 @@ async def process_single_item(client: httpx.AsyncClient, item: dict) -> dict:
     }
 
 
-async def process_category(client: httpx.AsyncClient, category_num: int) -> dict:
+async def process_category(client: httpx.AsyncClient, category_num: int, semaphore: asyncio.Semaphore) -> dict:
     """
     Process single category page
-    
+
     Args:
         client: httpx async client
         category_num: Category number (1-4)
-    
+        semaphore: Semaphore bounding concurrent page fetches
+
     Returns:
         Dictionary containing category information and sub-items
     """
@@ -218,8 +230,8 @@ async def process_category(client: httpx.AsyncClient, category_num: int) -> dict
     
     logger.info(f"Category {category_num} found {len(items)} items, starting concurrent processing of third-level pages...")
     
-    # Process all third-level pages concurrently
-    tasks = [process_single_item(client, item) for item in items]
+    # Process all third-level pages concurrently, bounded by the shared semaphore
+    tasks = [process_single_item(client, item, semaphore) for item in items]
     enhanced_items = await asyncio.gather(*tasks, return_exceptions=True)
     
     # Filter out exception results, keep valid results
@@ -262,8 +274,10 @@ async def scrape_all_categories() -> list:
         limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)  # Limit connections
     ) as client:
         
-        # Process 4 category pages concurrently
-        tasks = [process_category(client, i) for i in range(1, 5)]
+        # Process 4 category pages concurrently; third-level fetches across all
+        # categories share one semaphore so total concurrency stays bounded
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        tasks = [process_category(client, i, semaphore) for i in range(1, 5)]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Filter out exception results
@@ -360,7 +374,7 @@ def load_cached_data(output_file: str = DEFAULT_OUTPUT_FILE) -> dict:
     """
     try:
         with open(output_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=SafeLoader)
     except Exception as e:
         logger.error(f"Failed to read cache file: {e}")
         return {}
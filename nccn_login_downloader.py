@@ -10,6 +10,7 @@ from bs4 import BeautifulSoup
 import os
 import time
 import logging
+from logging.handlers import RotatingFileHandler
 from datetime import datetime
 
 # Ensure logs directory exists
@@ -32,8 +33,8 @@ if not logger.handlers:
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
     
-    # Add file handler
-    file_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'nccn_downloader.log'))
+    # Add size-bounded file handler; the file is only opened on the first record
+    file_handler = RotatingFileHandler(os.path.join(LOGS_DIR, 'nccn_downloader.log'), maxBytes=5 * 1024 * 1024, backupCount=3, delay=True)
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -44,6 +45,12 @@ if not logger.handlers:
 # Constants
 PDF_CACHE_MAX_AGE_DAYS = 7  # Default maximum PDF cache file validity period (days)
 
+# In-memory index of validated cache files. Maps save_path to the st_mtime_ns
+# seen at validation so repeat requests for the same unchanged PDF can skip
+# the full cache-age computation; the validity deadline is computed per call
+# from the caller's max_cache_age_days.
+_validated_pdf_index = {}
+
 def check_pdf_cache_age(file_path: str, max_age_days: int = PDF_CACHE_MAX_AGE_DAYS) -> dict:
     """
     Check PDF cache file age and validity
@@ -59,6 +66,7 @@ def check_pdf_cache_age(file_path: str, max_age_days: int = PDF_CACHE_MAX_AGE_DA
         'exists': False,
         'file_path': file_path,
         'size': 0,
+        'mtime_ns': None,
         'created_time': None,
         'modified_time': None,
         'age_days': 0,
@@ -69,6 +77,7 @@ def check_pdf_cache_age(file_path: str, max_age_days: int = PDF_CACHE_MAX_AGE_DA
         cache_info['exists'] = True
         stat = os.stat(file_path)
         cache_info['size'] = stat.st_size
+        cache_info['mtime_ns'] = stat.st_mtime_ns
         cache_info['created_time'] = datetime.fromtimestamp(stat.st_ctime)
         cache_info['modified_time'] = datetime.fromtimestamp(stat.st_mtime)
         
@@ -231,9 +240,28 @@ class NCCNDownloader:
             
             # Check if file already exists and is still valid (not too old)
             if skip_if_exists:
+                # Fast path: the file was validated before and is unchanged on
+                # disk; the deadline is derived from this call's
+                # max_cache_age_days so stricter callers are never
+                # short-circuited by an earlier, looser validation
+                validated_mtime_ns = _validated_pdf_index.get(save_path)
+                if validated_mtime_ns is not None:
+                    try:
+                        stat = os.stat(save_path)
+                    except FileNotFoundError:
+                        del _validated_pdf_index[save_path]
+                    else:
+                        if (stat.st_mtime_ns == validated_mtime_ns
+                                and stat.st_size > 0
+                                and time.time() < stat.st_mtime + max_cache_age_days * 86400):
+                            logger.info(f"Using valid cached PDF: {save_path}")
+                            return True, filename
+
                 cache_info = check_pdf_cache_age(save_path, max_cache_age_days)
                 if cache_info['exists']:
                     if cache_info['is_valid']:
+                        # Remember the validation so repeat requests skip the full check
+                        _validated_pdf_index[save_path] = cache_info['mtime_ns']
                         logger.info(f"Using valid cached PDF: {save_path}")
                         logger.info(f"File size: {cache_info['size']} bytes, age: {cache_info['age_days']} days")
                         return True, filename
@@ -250,75 +278,71 @@ class NCCNDownloader:
                 'Referer': 'https://www.nccn.org/',
             }
             
-            # First, make a regular GET request to check the response
-            response = await self.session.get(pdf_url, headers=pdf_headers, follow_redirects=True)
-            
-            logger.info(f"Response status: {response.status_code}")
-            logger.info(f"Final URL: {response.url}")
-            
-            # Check if we were redirected to a login page
-            if response.status_code == 200:
-                content_type = response.headers.get('Content-Type', '')
-                logger.info(f"Content-Type: {content_type}")
-                
-                # Check if this is actually a PDF
-                if 'application/pdf' in content_type:
-                    # This is a PDF, save it directly
-                    with open(save_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    file_size = os.path.getsize(save_path)
-                    logger.info(f"PDF file saved to: {save_path}")
-                    logger.info(f"File size: {file_size} bytes")
-                    return True, filename
-                
-                elif 'text/html' in content_type:
-                    # This is HTML, likely a login page
-                    response_text = response.text
-                    
-                    if 'login' in response_text.lower() or 'log in' in response_text.lower():
-                        logger.info("Login required detected, attempting automatic login...")
-                        
-                        # If login credentials are provided, attempt to log in
-                        login_username = username or self.username
-                        login_password = password or self.password
-                        
-                        if login_username and login_password:
-                            if await self.login(login_username, login_password, pdf_url):
-                                logger.info("Login successful, re-downloading PDF...")
-                                time.sleep(1)  # Wait for login state to stabilize
-                                # Recursive call, but do not pass login credentials to avoid infinite loop
-                                return await self.download_pdf(pdf_url, download_dir=download_dir, skip_if_exists=skip_if_exists, max_cache_age_days=max_cache_age_days)
-                            else:
-                                logger.error("Automatic login failed.")
-                                return False, filename
-                        else:
-                            logger.error("Login required but username and password not provided.")
-                            return False, filename
+            # Stream the response so PDF bodies go to disk chunk by chunk
+            # instead of being buffered in memory first
+            response_text = None
+            redirect_url = None
+            async with self.session.stream('GET', pdf_url, headers=pdf_headers, follow_redirects=True) as response:
+                logger.info(f"Response status: {response.status_code}")
+                logger.info(f"Final URL: {response.url}")
+
+                # Check if we were redirected to a login page
+                if response.status_code == 200:
+                    content_type = response.headers.get('Content-Type', '')
+                    logger.info(f"Content-Type: {content_type}")
+
+                    # Check if this is actually a PDF
+                    if 'application/pdf' in content_type:
+                        # This is a PDF; stream it to a temp name and rename on
+                        # success so a failed transfer can never leave a
+                        # truncated file at save_path to be served as a valid
+                        # cached PDF
+                        temp_path = save_path + '.part'
+                        try:
+                            with open(temp_path, 'wb') as f:
+                                async for chunk in response.aiter_bytes():
+                                    f.write(chunk)
+                            os.replace(temp_path, save_path)
+                        finally:
+                            if os.path.exists(temp_path):
+                                os.remove(temp_path)
+
+                        file_size = os.path.getsize(save_path)
+                        logger.info(f"PDF file saved to: {save_path}")
+                        logger.info(f"File size: {file_size} bytes")
+                        return True, filename
+
+                    elif 'text/html' in content_type:
+                        # This is HTML, likely a login page; read it fully so the
+                        # connection is released before any login round-trip
+                        await response.aread()
+                        response_text = response.text
                     else:
-                        logger.warning("Received HTML response but no login form detected.")
-                        logger.debug(f"Response preview: {response_text[:500]}...")
+                        logger.warning(f"Unexpected content type: {content_type}")
                         return False, filename
+
+                elif response.status_code == 302:
+                    # Handle redirect manually if needed
+                    redirect_url = response.headers.get('Location')
+                    logger.info(f"Received redirect to: {redirect_url}")
+
                 else:
-                    logger.warning(f"Unexpected content type: {content_type}")
+                    logger.error(f"Download failed, status code: {response.status_code}")
                     return False, filename
-            
-            elif response.status_code == 302:
-                # Handle redirect manually if needed
-                redirect_url = response.headers.get('Location')
-                logger.info(f"Received redirect to: {redirect_url}")
-                
-                # Check if redirect is to login page
-                if redirect_url and 'login' in redirect_url.lower():
-                    logger.info("Redirected to login page, attempting automatic login...")
-                    
+
+            if response_text is not None:
+                if 'login' in response_text.lower() or 'log in' in response_text.lower():
+                    logger.info("Login required detected, attempting automatic login...")
+
+                    # If login credentials are provided, attempt to log in
                     login_username = username or self.username
                     login_password = password or self.password
-                    
+
                     if login_username and login_password:
                         if await self.login(login_username, login_password, pdf_url):
                             logger.info("Login successful, re-downloading PDF...")
-                            time.sleep(1)
+                            time.sleep(1)  # Wait for login state to stabilize
+                            # Recursive call, but do not pass login credentials to avoid infinite loop
                             return await self.download_pdf(pdf_url, download_dir=download_dir, skip_if_exists=skip_if_exists, max_cache_age_days=max_cache_age_days)
                         else:
                             logger.error("Automatic login failed.")
@@ -327,13 +351,32 @@ class NCCNDownloader:
                         logger.error("Login required but username and password not provided.")
                         return False, filename
                 else:
-                    logger.error(f"Unexpected redirect to: {redirect_url}")
+                    logger.warning("Received HTML response but no login form detected.")
+                    logger.debug(f"Response preview: {response_text[:500]}...")
+                    return False, filename
+
+            # Check if redirect is to login page
+            if redirect_url and 'login' in redirect_url.lower():
+                logger.info("Redirected to login page, attempting automatic login...")
+
+                login_username = username or self.username
+                login_password = password or self.password
+
+                if login_username and login_password:
+                    if await self.login(login_username, login_password, pdf_url):
+                        logger.info("Login successful, re-downloading PDF...")
+                        time.sleep(1)
+                        return await self.download_pdf(pdf_url, download_dir=download_dir, skip_if_exists=skip_if_exists, max_cache_age_days=max_cache_age_days)
+                    else:
+                        logger.error("Automatic login failed.")
+                        return False, filename
+                else:
+                    logger.error("Login required but username and password not provided.")
                     return False, filename
-            
             else:
-                logger.error(f"Download failed, status code: {response.status_code}")
+                logger.error(f"Unexpected redirect to: {redirect_url}")
                 return False, filename
-                
+
         except Exception as e:
             logger.error(f"An error occurred during download: {str(e)}")
             return False, filename
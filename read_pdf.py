@@ -1,6 +1,8 @@
 from pypdf import PdfReader
 import logging
+from logging.handlers import RotatingFileHandler
 import os
+import re
 from typing import List, Optional, Dict, Any
 
 # Ensure logs directory exists
@@ -23,8 +25,8 @@ if not logger.handlers:
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
     
-    # Add file handler
-    file_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'read_pdf.log'))
+    # Add size-bounded file handler; the file is only opened on the first record
+    file_handler = RotatingFileHandler(os.path.join(LOGS_DIR, 'read_pdf.log'), maxBytes=5 * 1024 * 1024, backupCount=3, delay=True)
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -32,6 +34,10 @@ if not logger.handlers:
     # Prevent propagation to root logger to avoid duplicate logs
     logger.propagate = False
 
+# Compiled once at module level: matches a single page number ("3", "-1") or a
+# page range ("1-5", "2--1"), both with optional negative indexing
+_PAGE_SPEC_PATTERN = re.compile(r'^(-?\d+)(?:\s*-\s*(-?\d+))?$')
+
 
 class PDFReader:
     """PDF content reader using pypdf to preserve layout and extract internal links"""
@@ -100,7 +106,6 @@ class PDFReader:
                                             # 提取indd:后面的数字部分
                                             target_parts = target.split("indd:")[1]
                                             # 可能包含多个部分，取最后一个数字
-                                            import re
                                             numbers = re.findall(r'\d+', target_parts)
                                             if numbers:
                                                 try:
@@ -110,7 +115,6 @@ class PDFReader:
                                                     pass
                                         else:
                                             # 尝试直接解析为数字引用
-                                            import re
                                             numbers = re.findall(r'\d+', target)
                                             if numbers:
                                                 try:
@@ -143,46 +147,46 @@ class PDFReader:
             part = part.strip()
             if not part:
                 continue
-            
-            try:
-                # Check if it's a page range (e.g., "1-5")
-                if '-' in part:
-                    start_str, end_str = part.split('-', 1)
-                    start_page = int(start_str.strip())
-                    end_page = int(end_str.strip())
-                    
-                    # Handle negative indexing
-                    if start_page < 0:
-                        start_page = total_pages + start_page + 1
-                    if end_page < 0:
-                        end_page = total_pages + end_page + 1
-                    
-                    # Ensure range is valid
-                    if start_page <= 0 or end_page <= 0:
-                        continue
-                    if start_page > end_page:
-                        start_page, end_page = end_page, start_page
-                    
-                    # Add all page numbers in range (convert to 0-based index)
-                    for page_num in range(start_page, end_page + 1):
-                        if 1 <= page_num <= total_pages:
-                            pages.append(page_num - 1)  # Convert to 0-based index
-                else:
-                    # Single page number
-                    page_num = int(part)
-                    if page_num < 0:
-                        page_num = total_pages + page_num + 1
-                    elif page_num <= 0:
-                        continue  # Skip invalid page numbers
-                    
-                    if 1 <= page_num <= total_pages:
-                        pages.append(page_num - 1)  # Convert to 0-based index
-                        
-            except ValueError:
+
+            match = _PAGE_SPEC_PATTERN.match(part)
+            if not match:
                 # Skip unparseable parts
                 logger.warning(f"Could not parse page specification: {part}")
                 continue
-                
+
+            start_str, end_str = match.groups()
+            if end_str is not None:
+                # Page range (e.g., "1-5")
+                start_page = int(start_str)
+                end_page = int(end_str)
+
+                # Handle negative indexing
+                if start_page < 0:
+                    start_page = total_pages + start_page + 1
+                if end_page < 0:
+                    end_page = total_pages + end_page + 1
+
+                # Ensure range is valid
+                if start_page <= 0 or end_page <= 0:
+                    continue
+                if start_page > end_page:
+                    start_page, end_page = end_page, start_page
+
+                # Add all page numbers in range (convert to 0-based index)
+                for page_num in range(start_page, end_page + 1):
+                    if 1 <= page_num <= total_pages:
+                        pages.append(page_num - 1)  # Convert to 0-based index
+            else:
+                # Single page number
+                page_num = int(start_str)
+                if page_num < 0:
+                    page_num = total_pages + page_num + 1
+                elif page_num <= 0:
+                    continue  # Skip invalid page numbers
+
+                if 1 <= page_num <= total_pages:
+                    pages.append(page_num - 1)  # Convert to 0-based index
+
         return sorted(set(pages))
 
     def extract_text_with_layout(self, page) -> str:
@@ -287,3 +291,13 @@ class PDFReader:
         except Exception as e:
             logger.error(f"Failed to extract PDF content: {str(e)}")
             raise ValueError(f"Failed to extract PDF content: {str(e)}")
+
+
+def extract_content_worker(pdf_path: str, pages: Optional[str] = None) -> str:
+    """
+    Module-level extraction entry point for use with ProcessPoolExecutor.
+
+    Builds a fresh PDFReader in the worker process so no reader state needs
+    to be pickled across the process boundary.
+    """
+    return PDFReader().extract_content(pdf_path, pages)
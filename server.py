@@ -15,11 +15,24 @@ Configuration:
 
 import os
 import sys
-import yaml
+import json
+import atexit
 import asyncio
+
+# orjson serializes and parses the sidecar several times faster than the
+# stdlib json; it is an optional accelerator, so fall back to the stdlib
+# when it is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import logging
 import threading
-from typing import Any, Dict, List, Optional
+from logging.handlers import RotatingFileHandler
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 from pathlib import Path
 
 # Add the current directory to the Python path for imports
@@ -30,37 +43,271 @@ sys.path.insert(0, str(current_dir))
 LOGS_DIR = current_dir / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
-# Configure logging
+# Configure logging; the log file is size-bounded via rotation and only
+# opened on the first record (delay=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler(LOGS_DIR / 'server.log')
+        RotatingFileHandler(LOGS_DIR / 'server.log', maxBytes=5 * 1024 * 1024, backupCount=3, delay=True)
     ]
 )
 
 logger = logging.getLogger(__name__)
 
+# Only the MCP framework is imported eagerly; PyYAML, pypdf (via read_pdf),
+# the downloader, and the index scraper are imported lazily at first use so
+# cold start does not pay for modules a given session may never touch.
 from mcp.server.fastmcp import FastMCP
-from read_pdf import PDFReader
-from nccn_login_downloader import NCCNDownloader
-from nccn_get_index import ensure_nccn_index
 
 # Constants
 GUIDELINES_INDEX_FILE = "nccn_guidelines_index.yaml"
+GUIDELINES_SIDECAR_FILE = GUIDELINES_INDEX_FILE + ".json"
 DOWNLOAD_DIR = "downloads"
 
+# Resolve the download directory once at import time (mirroring LOGS_DIR)
+# instead of rebuilding the path on every tool call
+DOWNLOAD_PATH = current_dir / DOWNLOAD_DIR
+DOWNLOAD_PATH.mkdir(exist_ok=True)
+
+# Index file paths, resolved once rather than rebuilt per request
+GUIDELINES_INDEX_PATH = current_dir / GUIDELINES_INDEX_FILE
+GUIDELINES_SIDECAR_PATH = current_dir / GUIDELINES_SIDECAR_FILE
+
 # Global configuration from environment variables
 NCCN_USERNAME = os.getenv('NCCN_USERNAME')
 NCCN_PASSWORD = os.getenv('NCCN_PASSWORD')
 
+# Transport configuration; use HTTP for deployment, stdio for local dev
+MCP_TRANSPORT = os.getenv('MCP_TRANSPORT', 'stdio')
+MCP_HOST = os.getenv('MCP_HOST', '0.0.0.0')
+MCP_PORT = int(os.getenv('MCP_PORT', '8000'))
+
+# Initialization task handle; module-level so the lifespan below only ever
+# starts it once per process
+_init_task: Optional["asyncio.Task"] = None
+
+@asynccontextmanager
+async def server_lifespan(server: "FastMCP") -> AsyncIterator[None]:
+    """
+    Ensure index initialization runs as a background task on the server's event loop.
+
+    The FastMCP lifespan is entered once per process for stdio but once per
+    client session for the SSE and streamable HTTP transports, so the
+    initialization task is created only on the first entry and is left to run
+    to completion rather than being cancelled when a session closes.
+    """
+    global _init_task
+    if _init_task is None:
+        _init_task = asyncio.create_task(initialize_server())
+    yield
+
 # Initialize FastMCP server
-mcp = FastMCP("nccn-guidelines")
+mcp = FastMCP("nccn-guidelines", lifespan=server_lifespan)
+
+# Shared downloader, created lazily on first use. A single instance keeps one
+# httpx connection pool and carries NCCN login session cookies across calls,
+# so repeat downloads skip both the TCP/TLS setup and the login round-trip.
+_downloader = None
+
+def _close_downloader() -> None:
+    """Best-effort close of the shared downloader's HTTP client at process exit."""
+    if _downloader is not None and not _downloader.session.is_closed:
+        try:
+            asyncio.run(_downloader.session.aclose())
+        except Exception:
+            pass
+
+atexit.register(_close_downloader)
+
+def _get_downloader():
+    """
+    Return the shared NCCNDownloader, creating it on first use.
+
+    Recreates the instance if its HTTP client was somehow closed, so a stale
+    handle can never fail every subsequent download.
+    """
+    global _downloader
+    if _downloader is None or _downloader.session.is_closed:
+        from nccn_login_downloader import NCCNDownloader
+        _downloader = NCCNDownloader(NCCN_USERNAME, NCCN_PASSWORD)
+    return _downloader
+
+# Worker pool for CPU-bound PDF extraction; created lazily so that simply
+# importing the server does not fork worker processes. Running extraction in
+# separate processes keeps the event loop responsive and bypasses the GIL.
+PDF_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+_extract_executor: Optional[ProcessPoolExecutor] = None
+
+def _shutdown_extract_executor() -> None:
+    """Shut down the extraction pool at process exit."""
+    global _extract_executor
+    if _extract_executor is not None:
+        _extract_executor.shutdown(wait=False, cancel_futures=True)
+        _extract_executor = None
+
+def _get_extract_executor() -> ProcessPoolExecutor:
+    """Return the shared PDF extraction process pool, creating it on first use."""
+    global _extract_executor
+    if _extract_executor is None:
+        _extract_executor = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+        atexit.register(_shutdown_extract_executor)
+        logger.info(f"Started PDF extraction pool with {PDF_EXTRACT_WORKERS} workers")
+    return _extract_executor
+
+# In-memory cache for the guidelines index, keyed by the YAML file's mtime.
+# The index changes at most once per refresh cycle (max_age_days=7), so repeat
+# tool calls can reuse the raw text and parsed dict instead of re-reading and
+# re-parsing the file on every invocation.
+_INDEX_CACHE: Dict[str, Any] = {
+    "mtime": None,
+    "raw": None,
+    "parsed": None,
+    "formatted": None,
+    "by_title": {},
+    "by_category": {},
+}
+_INDEX_CACHE_LOCK = threading.Lock()
+
+# LRU cache for extracted PDF content, keyed by (path, page spec, file mtime).
+# Guideline PDFs are static between weekly refreshes, so repeat extractions of
+# the same page ranges can skip re-opening and re-parsing the PDF.
+_EXTRACT_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_EXTRACT_CACHE_LOCK = threading.Lock()
+_EXTRACT_CACHE_MAX_ENTRIES = 32
+
+# Cache of resolved PDF paths keyed by the user-supplied path argument, so
+# repeat extractions skip the per-call existence probes against the downloads
+# and server directories.
+_PATH_RESOLVE_CACHE: Dict[str, str] = {}
+
+def _resolve_pdf(pdf_path: str) -> Optional[str]:
+    """
+    Resolve a user-supplied PDF path, trying the downloads directory first and
+    the server directory second.
+
+    Successful resolutions of relative paths are cached; a cached entry is
+    dropped and re-resolved when its file no longer exists. Returns None when
+    the path cannot be resolved.
+    """
+    if os.path.isabs(pdf_path):
+        return pdf_path
+
+    resolved = _PATH_RESOLVE_CACHE.get(pdf_path)
+    if resolved is not None:
+        if os.path.exists(resolved):
+            return resolved
+        del _PATH_RESOLVE_CACHE[pdf_path]
+
+    for candidate in (DOWNLOAD_PATH / pdf_path, current_dir / pdf_path):
+        if candidate.exists():
+            resolved = str(candidate)
+            _PATH_RESOLVE_CACHE[pdf_path] = resolved
+            return resolved
+
+    return None
+
+def _parse_yaml(text: str) -> Dict[str, Any]:
+    """Parse YAML text, preferring the libyaml C binding when available."""
+    import yaml
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+    return yaml.load(text, Loader=SafeLoader)
+
+def _write_sidecar(guidelines_data: Dict[str, Any]) -> None:
+    """
+    Persist a pre-parsed JSON sidecar next to the YAML index.
+
+    JSON deserialization is much faster than a YAML parse, so cold starts can
+    load the sidecar instead as long as it is at least as new as the YAML file.
+    """
+    try:
+        if orjson is not None:
+            GUIDELINES_SIDECAR_PATH.write_bytes(orjson.dumps(guidelines_data))
+        else:
+            GUIDELINES_SIDECAR_PATH.write_text(json.dumps(guidelines_data, ensure_ascii=False), encoding='utf-8')
+        logger.info(f"Wrote guidelines index sidecar: {GUIDELINES_SIDECAR_PATH}")
+    except Exception as e:
+        logger.warning(f"Could not write guidelines index sidecar: {str(e)}")
+
+def _load_parsed_index(index_path: Path, raw: str) -> Dict[str, Any]:
+    """
+    Return the parsed index, preferring the JSON sidecar over a YAML parse.
+
+    The sidecar is only trusted when its mtime is at least the YAML file's;
+    otherwise the YAML text is parsed and the sidecar rewritten.
+    """
+    try:
+        if GUIDELINES_SIDECAR_PATH.stat().st_mtime_ns >= index_path.stat().st_mtime_ns:
+            data = GUIDELINES_SIDECAR_PATH.read_bytes()
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not load guidelines index sidecar, falling back to YAML: {str(e)}")
+
+    parsed = _parse_yaml(raw)
+    _write_sidecar(parsed)
+    return parsed
+
+def _build_lookup_maps(guidelines_data: Dict[str, Any]) -> tuple:
+    """
+    Build {title: url} and {category: [guidelines]} lookup maps from the
+    parsed index so consumers get O(1) access instead of scanning the
+    nested category lists.
+    """
+    by_title: Dict[str, str] = {}
+    by_category: Dict[str, List[Dict[str, str]]] = {}
 
-# Global instances
-pdf_reader = PDFReader()
-downloader = NCCNDownloader()
+    if isinstance(guidelines_data, dict):
+        for category_data in guidelines_data.get("nccn_guidelines", []):
+            category = category_data.get("category", "Unknown Category")
+            guidelines = category_data.get("guidelines", [])
+            by_category[category] = guidelines
+            for guideline in guidelines:
+                title = guideline.get("title")
+                url = guideline.get("url")
+                if title and url:
+                    by_title[title] = url
+
+    return by_title, by_category
+
+def lookup_guideline_url(title: str) -> Optional[str]:
+    """Resolve a guideline title to its URL via the precomputed lookup map."""
+    try:
+        return _refresh_index_cache()["by_title"].get(title)
+    except Exception as e:
+        logger.error(f"Error looking up guideline '{title}': {str(e)}")
+        return None
+
+def _refresh_index_cache() -> Dict[str, Any]:
+    """
+    Return the index cache, reloading the YAML file only when its mtime changed.
+
+    Raises:
+        FileNotFoundError: If the guidelines index file does not exist.
+        yaml.YAMLError: If the index file cannot be parsed.
+    """
+    mtime = GUIDELINES_INDEX_PATH.stat().st_mtime_ns
+    with _INDEX_CACHE_LOCK:
+        if _INDEX_CACHE["mtime"] == mtime:
+            return _INDEX_CACHE
+
+        # Read the whole file as bytes and decode once; text mode would route
+        # every read through incremental decoding and newline translation
+        raw = GUIDELINES_INDEX_PATH.read_bytes().decode('utf-8')
+        parsed = _load_parsed_index(GUIDELINES_INDEX_PATH, raw)
+
+        _INDEX_CACHE["mtime"] = mtime
+        _INDEX_CACHE["raw"] = raw
+        _INDEX_CACHE["parsed"] = parsed
+        _INDEX_CACHE["formatted"] = None  # Rebuilt lazily on the next resource fetch
+        _INDEX_CACHE["by_title"], _INDEX_CACHE["by_category"] = _build_lookup_maps(parsed)
+        logger.info(f"Reloaded guidelines index cache from {GUIDELINES_INDEX_PATH}")
+        return _INDEX_CACHE
 
 async def initialize_server():
     """
@@ -77,13 +324,17 @@ async def initialize_server():
         logger.info("  Set NCCN_USERNAME and NCCN_PASSWORD environment variables for full access.")
     
     try:
+        from nccn_get_index import ensure_nccn_index
+
         # Ensure the guidelines index exists and is up to date
         guidelines_data = await ensure_nccn_index(
-            output_file=str(current_dir / GUIDELINES_INDEX_FILE),
+            output_file=str(GUIDELINES_INDEX_PATH),
             max_age_days=7  # Refresh index every 7 days
         )
         
         if guidelines_data:
+            # Refresh the sidecar so later cold starts can skip the YAML parse
+            _write_sidecar(guidelines_data)
             total_categories = len(guidelines_data.get('nccn_guidelines', []))
             total_guidelines = sum(
                 len(cat.get('guidelines', [])) 
@@ -101,47 +352,57 @@ async def initialize_server():
 
 def load_guidelines_index() -> Dict[str, Any]:
     """Load the NCCN guidelines index from YAML file."""
-    index_path = current_dir / GUIDELINES_INDEX_FILE
+    import yaml
     try:
-        with open(index_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return _refresh_index_cache()["parsed"]
     except FileNotFoundError:
-        logger.error(f"Guidelines index file not found: {index_path}")
+        logger.error(f"Guidelines index file not found: {GUIDELINES_INDEX_PATH}")
         return {"error": "Guidelines index file not found"}
     except yaml.YAMLError as e:
         logger.error(f"Error parsing guidelines index: {str(e)}")
         return {"error": f"Error parsing guidelines index: {str(e)}"}
 
+def _iter_index_lines(by_category: Dict[str, List[Dict[str, str]]]) -> Iterator[str]:
+    """Yield the lines of the human-readable guidelines index."""
+    yield "NCCN Guidelines Index"
+    yield "=" * 20
+    yield ""
+
+    for category, guidelines in by_category.items():
+        yield f"Category: {category}"
+        yield "-" * (len(category) + 10)
+
+        for guideline in guidelines:
+            yield f"  • {guideline.get('title', 'Unknown Title')}"
+            yield f"    URL: {guideline.get('url', 'No URL')}"
+
+        yield ""
+
+def _format_guidelines_index(by_category: Dict[str, List[Dict[str, str]]]) -> str:
+    """Format the category lookup map as a human-readable index string."""
+    return "\n".join(_iter_index_lines(by_category))
+
 @mcp.resource("nccn://guidelines-index")
 async def get_guidelines_index() -> str:
     """
     Provides access to the NCCN guidelines index containing all available guidelines
     organized by category with their corresponding URLs.
     """
-    guidelines_data = load_guidelines_index()
+    # The cache refresh stats and possibly re-reads the index file; run it in
+    # a worker thread so the blocking I/O stays off the event loop
+    guidelines_data = await asyncio.to_thread(load_guidelines_index)
     if "error" in guidelines_data:
         return f"Error loading guidelines: {guidelines_data['error']}"
-    
-    # Format the guidelines data for easy reading
-    result = ["NCCN Guidelines Index", "=" * 20, ""]
-    
-    if "nccn_guidelines" in guidelines_data:
-        for category_data in guidelines_data["nccn_guidelines"]:
-            category = category_data.get("category", "Unknown Category")
-            guidelines = category_data.get("guidelines", [])
-            
-            result.append(f"Category: {category}")
-            result.append("-" * (len(category) + 10))
-            
-            for guideline in guidelines:
-                title = guideline.get("title", "Unknown Title")
-                url = guideline.get("url", "No URL")
-                result.append(f"  • {title}")
-                result.append(f"    URL: {url}")
-            
-            result.append("")
-    
-    return "\n".join(result)
+
+    # Reuse the formatted string until the index file changes; load_guidelines_index
+    # above has already invalidated the slot if the mtime moved.
+    with _INDEX_CACHE_LOCK:
+        formatted = _INDEX_CACHE["formatted"]
+        if formatted is None:
+            formatted = _format_guidelines_index(_INDEX_CACHE["by_category"])
+            _INDEX_CACHE["formatted"] = formatted
+
+    return formatted
 
 @mcp.tool()
 async def get_index() -> str:
@@ -152,18 +413,34 @@ async def get_index() -> str:
         String containing the raw YAML content of the guidelines index
     """
     try:
-        index_path = current_dir / GUIDELINES_INDEX_FILE
-        with open(index_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            logger.info(f"Successfully loaded guidelines index from {index_path}")
-            return content
+        # Run the stat/read in a worker thread to keep file I/O off the event loop
+        content = (await asyncio.to_thread(_refresh_index_cache))["raw"]
+        logger.info(f"Successfully loaded guidelines index from {GUIDELINES_INDEX_PATH}")
+        return content
     except FileNotFoundError:
-        logger.error(f"Guidelines index file not found: {index_path}")
+        logger.error(f"Guidelines index file not found: {GUIDELINES_INDEX_PATH}")
         return "Error: Guidelines index file not found"
     except Exception as e:
         logger.error(f"Error reading guidelines index: {str(e)}")
         return f"Error reading guidelines index: {str(e)}"
 
+@mcp.tool()
+async def find_url(title: str) -> str:
+    """
+    Find the URL for a guideline by its exact title.
+
+    Args:
+        title: Guideline title exactly as it appears in the guidelines index
+
+    Returns:
+        The guideline URL, or an error message if the title is not in the index
+    """
+    url = await asyncio.to_thread(lookup_guideline_url, title)
+    if url:
+        return url
+    logger.warning(f"No guideline found with title: {title}")
+    return f"No guideline found with title: {title}"
+
 @mcp.tool()
 async def download_pdf(url: str) -> str:
     """
@@ -179,33 +456,29 @@ async def download_pdf(url: str) -> str:
         String indicating success/failure and the path to the downloaded file
     """
     try:
-        # Ensure download directory exists
-        download_path = current_dir / DOWNLOAD_DIR
-        download_path.mkdir(exist_ok=True)
-        
         # Use provided credentials or fall back to global configuration
         auth_username = NCCN_USERNAME
         auth_password = NCCN_PASSWORD
         
-        # Create downloader instance with credentials if available
+        # Reuse the shared downloader so the connection pool and any login
+        # session cookies persist across calls
+        downloader_instance = _get_downloader()
         if auth_username and auth_password:
-            downloader_instance = NCCNDownloader(auth_username, auth_password)
             logger.info(f"Using NCCN authentication for user: {auth_username}")
         else:
-            downloader_instance = downloader
             logger.info("No NCCN authentication configured - attempting anonymous download")
         
         # Download the PDF
         success, actual_filename = await downloader_instance.download_pdf(
             pdf_url=url,
-            download_dir=str(download_path),
+            download_dir=str(DOWNLOAD_PATH),
             username=auth_username,
             password=auth_password,
             skip_if_exists=True
         )
         
         # Update the full path with the actual filename used
-        actual_full_path = download_path / actual_filename
+        actual_full_path = DOWNLOAD_PATH / actual_filename
         
         if success:
             logger.info(f"PDF downloaded successfully: {actual_full_path}")
@@ -235,28 +508,41 @@ async def extract_content(pdf_path: str, pages: Optional[str] = None) -> str:
         Extracted text content from the specified pages
     """
     try:
-        # Resolve PDF path
-        if not os.path.isabs(pdf_path):
-            # Try relative to downloads directory first
-            download_path = current_dir / DOWNLOAD_DIR / pdf_path
-            if download_path.exists():
-                pdf_path = str(download_path)
-            else:
-                # Try relative to current directory
-                current_path = current_dir / pdf_path
-                if current_path.exists():
-                    pdf_path = str(current_path)
-                else:
-                    logger.error(f"PDF file not found: {pdf_path}")
-                    return f"PDF file not found: {pdf_path}"
-        
-        # Extract content using PDFReader
-        content = pdf_reader.extract_content(pdf_path, pages)
+        # Resolve PDF path via the cached resolver
+        resolved_path = _resolve_pdf(pdf_path)
+        if resolved_path is None:
+            logger.error(f"PDF file not found: {pdf_path}")
+            return f"PDF file not found: {pdf_path}"
+        pdf_path = resolved_path
         
+        # Serve repeat extractions of the same pages from the LRU cache,
+        # invalidated when the file changes on disk
+        cache_key = (pdf_path, pages, os.stat(pdf_path).st_mtime_ns)
+        with _EXTRACT_CACHE_LOCK:
+            if cache_key in _EXTRACT_CACHE:
+                _EXTRACT_CACHE.move_to_end(cache_key)
+                logger.info(f"Serving cached extraction for {pdf_path} (pages: {pages or 'all'})")
+                return _EXTRACT_CACHE[cache_key]
+
+        # Extract content in a worker process so the CPU-bound pypdf work
+        # does not block the event loop
+        from read_pdf import extract_content_worker
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+            _get_extract_executor(), extract_content_worker, pdf_path, pages
+        )
+
         if not content.strip():
             logger.warning(f"No content extracted from {pdf_path} (pages: {pages or 'all'})")
             return f"No content extracted from {pdf_path} (pages: {pages or 'all'})"
         
+        with _EXTRACT_CACHE_LOCK:
+            _EXTRACT_CACHE[cache_key] = content
+            _EXTRACT_CACHE.move_to_end(cache_key)
+            while len(_EXTRACT_CACHE) > _EXTRACT_CACHE_MAX_ENTRIES:
+                _EXTRACT_CACHE.popitem(last=False)
+
         logger.info(f"Successfully extracted content from {pdf_path} (pages: {pages or 'all'})")
         return content
     
@@ -264,36 +550,16 @@ async def extract_content(pdf_path: str, pages: Optional[str] = None) -> str:
         logger.error(f"Error extracting content from PDF: {str(e)}")
         return f"Error extracting content from PDF: {str(e)}"
 
-def run_initialization_background():
-    """在后台线程中运行初始化"""
-    def background_init():
-        try:
-            asyncio.run(initialize_server())
-        except Exception as e:
-            logger.error(f"Background initialization error: {e}")
-    
-    thread = threading.Thread(target=background_init, daemon=True)
-    thread.start()
-
 if __name__ == "__main__":
-    import os
     logger.info("Starting MCP server with background initialization...")
-    run_initialization_background()
-
-    # Use HTTP transport for deployment, stdio for local dev
-    transport = os.getenv("MCP_TRANSPORT", "stdio")
 
-    if transport == "http":
+    if MCP_TRANSPORT == "http":
         import uvicorn
-        host = os.getenv("MCP_HOST", "0.0.0.0")
-        port = int(os.getenv("MCP_PORT", "8000"))
-        logger.info(f"Starting Streamable HTTP server on {host}:{port}/mcp")
-        uvicorn.run(mcp.streamable_http_app(), host=host, port=port)
-    elif transport == "sse":
+        logger.info(f"Starting Streamable HTTP server on {MCP_HOST}:{MCP_PORT}/mcp")
+        uvicorn.run(mcp.streamable_http_app(), host=MCP_HOST, port=MCP_PORT)
+    elif MCP_TRANSPORT == "sse":
         import uvicorn
-        host = os.getenv("MCP_HOST", "0.0.0.0")
-        port = int(os.getenv("MCP_PORT", "8000"))
-        logger.info(f"Starting SSE server on {host}:{port}/sse")
-        uvicorn.run(mcp.sse_app(), host=host, port=port)
+        logger.info(f"Starting SSE server on {MCP_HOST}:{MCP_PORT}/sse")
+        uvicorn.run(mcp.sse_app(), host=MCP_HOST, port=MCP_PORT)
     else:
         mcp.run(transport="stdio")